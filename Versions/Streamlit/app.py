@@ -2,20 +2,23 @@ import streamlit as st
 import yt_dlp
 import os
 import re
-import pandas as pd
 from typing import List, Dict, Set
 import time
-import requests
-from io import BytesIO
-from PIL import Image
 import subprocess
 import logging
 import sys
+import functools
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 # Suppress yt-dlp and other library warnings
 logging.getLogger('yt_dlp').setLevel(logging.ERROR)
 os.environ['PYTHONWARNINGS'] = 'ignore'
 
+_PLAYLIST_RE = re.compile(r'^(https?://)?(www\.)?(youtube\.com|youtu\.?be)/playlist\?list=([a-zA-Z0-9_-]+)')
+
 def get_app_data_path():
     """Get the proper application data directory with downloads folder"""
     if getattr(sys, 'frozen', False):
@@ -43,6 +46,41 @@ def get_default_download_path():
     # Fallback to app directory
     return get_app_data_path()
 
+@functools.lru_cache(maxsize=1)
+def _ffmpeg_available() -> bool:
+    """Probe for FFmpeg once per process instead of on every rerun"""
+    try:
+        result = subprocess.run(['ffmpeg', '-version'], 
+                              capture_output=True, text=True, timeout=5)
+        return result.returncode == 0
+    except:
+        return False
+
+def _fmt_dur(duration):
+    """Format a duration in seconds as MM:SS or HH:MM:SS"""
+    if duration and duration != 'Unknown':
+        # Flat playlist entries can report fractional seconds
+        minutes, seconds = divmod(int(duration), 60)
+        hours, minutes = divmod(minutes, 60)
+        if hours > 0:
+            return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+        return f"{minutes:02d}:{seconds:02d}"
+    return "Unknown"
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def _cached_playlist_info(playlist_url: str) -> dict:
+    """Extract playlist info once per URL and reuse it across reruns"""
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        # Only list the entries - videos are resolved when they are downloaded
+        'extract_flat': True,
+    }
+    
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        # sanitize_info makes the result plain data so it can be pickled into the cache
+        return ydl.sanitize_info(ydl.extract_info(playlist_url, download=False))
+
 class YouTubePlaylistDownloader:
     def __init__(self, download_path=None):
         if download_path is None:
@@ -56,73 +94,78 @@ class YouTubePlaylistDownloader:
     
     def create_download_directory(self):
         """Create download directory if it doesn't exist"""
-        if not os.path.exists(self.download_path):
-            os.makedirs(self.download_path)
+        os.makedirs(self.download_path, exist_ok=True)
     
     def check_ffmpeg(self):
         """Check if FFmpeg is available (silent check)"""
-        try:
-            result = subprocess.run(['ffmpeg', '-version'], 
-                                  capture_output=True, text=True, timeout=5)
-            return result.returncode == 0
-        except:
-            return False
+        return _ffmpeg_available()
     
     def is_valid_playlist_url(self, url):
         """Check if the URL is a valid YouTube playlist URL"""
-        playlist_pattern = r'^(https?://)?(www\.)?(youtube\.com|youtu\.?be)/playlist\?list=([a-zA-Z0-9_-]+)'
-        return re.match(playlist_pattern, url) is not None
+        return _PLAYLIST_RE.match(url) is not None
     
     def get_playlist_info(self, playlist_url):
         """Get information about the playlist and all videos"""
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': True,
-        }
-        
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                playlist_info = ydl.extract_info(playlist_url, download=False)
-                return playlist_info
+            return _cached_playlist_info(playlist_url)
         except Exception as e:
             st.error(f"Error getting playlist info: {e}")
             return None
     
-    def get_video_thumbnail(self, video_id, quality='maxresdefault'):
-        """Get video thumbnail from YouTube"""
-        try:
-            thumbnail_url = f"https://i.ytimg.com/vi/{video_id}/{quality}.jpg"
-            response = requests.get(thumbnail_url, timeout=10)
-            
-            if response.status_code == 200:
-                image = Image.open(BytesIO(response.content))
-                return image
-        except:
-            pass
-        return None
-    
-    def progress_hook(self, d, status_container, video_title, console_content, update_console):
-        """Progress hook for real-time download feedback"""
+    def progress_hook(self, d, status_queue, idx, video_title, last_update, cancel_event):
+        """Progress hook for real-time download feedback (runs in worker threads)"""
+        # Raising from the hook is how yt-dlp lets us abort a running download
+        if cancel_event.is_set():
+            raise yt_dlp.utils.DownloadCancelled()
+        
         if d['status'] == 'downloading':
+            # yt-dlp fires this many times per second - report at most every 50 ms
+            now = time.monotonic()
+            if now - last_update[0] < 0.05:
+                return
+            last_update[0] = now
+            
             percent = d.get('_percent_str', '').strip()
             speed = d.get('_speed_str', '').strip()
             eta = d.get('_eta_str', '').strip()
             
             if percent and speed:
                 status_text = f"📥 {video_title[:50]}... | {percent} | {speed} | ETA: {eta}"
-                status_container.text(status_text)
+                status_queue.put({'idx': idx, 'text': status_text})
                 
         elif d['status'] == 'finished':
             filename = d.get('filename', '')
             file_ext = filename.split('.')[-1] if '.' in filename else 'file'
-            status_container.text(f"✅ {video_title[:50]}... | Download completed (.{file_ext})")
+            status_queue.put({'idx': idx, 'text': f"✅ {video_title[:50]}... | Download completed (.{file_ext})"})
             
         elif d['status'] == 'error':
-            status_container.text(f"❌ {video_title[:50]}... | Download failed")
+            status_queue.put({'idx': idx, 'text': f"❌ {video_title[:50]}... | Download failed"})
+    
+    def _download_one(self, idx, video_url, get_ydl, status_queue, video_title, cancel_event):
+        """Download a single video in a worker thread - never touches st.* directly"""
+        if cancel_event.is_set():
+            raise yt_dlp.utils.DownloadCancelled()
+        
+        ydl = get_ydl()
+        
+        # Swap in this video's hook instead of building a new YoutubeDL per video
+        last_update = [0.0]
+        ydl._progress_hooks = [
+            lambda d: self.progress_hook(d, status_queue, idx, video_title, last_update, cancel_event)
+        ]
+        
+        info = ydl.extract_info(video_url, download=True)
+        filename = None
+        if info:
+            # Postprocessors (audio extraction) can change the extension - prefer the final path
+            requested = info.get('requested_downloads') or [{}]
+            filename = requested[0].get('filepath') or ydl.prepare_filename(info)
+        
+        return idx, filename
     
     def download_videos(self, video_urls: List[str], selected_indices: Set[int], 
-                       audio_only: bool = False, quality: str = 'best'):
+                       audio_only: bool = False, quality: str = 'best', max_workers: int = 4,
+                       concurrent_fragments: int = 8, reencode_mp3: bool = False):
         """Download selected videos with real-time feedback"""
         if not video_urls:
             st.error("No videos selected for download")
@@ -130,7 +173,8 @@ class YouTubePlaylistDownloader:
         
         # Configure download options - SIMPLIFIED and RELIABLE
         ydl_opts = {
-            'outtmpl': os.path.join(self.download_path, '%(title)s.%(ext)s'),
+            # The video id keeps same-title entries from writing the same file in parallel
+            'outtmpl': os.path.join(self.download_path, '%(title)s [%(id)s].%(ext)s'),
             # Basic settings for reliability
             'quiet': False,
             'no_warnings': False,
@@ -139,6 +183,9 @@ class YouTubePlaylistDownloader:
             'retries': 10,
             'fragment_retries': 10,
             'file_access_retries': 3,
+            # Parallel DASH/HLS fragments and larger HTTP chunks
+            'concurrent_fragment_downloads': concurrent_fragments,
+            'http_chunk_size': 10485760,
             # Timeout settings
             'socket_timeout': 30,
             'extract_timeout': 60,
@@ -151,7 +198,7 @@ class YouTubePlaylistDownloader:
         }
         
         if audio_only:
-            if self.ffmpeg_available:
+            if self.ffmpeg_available and reencode_mp3:
                 ydl_opts.update({
                     'format': 'bestaudio/best',
                     'postprocessors': [{
@@ -160,6 +207,15 @@ class YouTubePlaylistDownloader:
                         'preferredquality': '192',
                     }]
                 })
+            elif self.ffmpeg_available:
+                # Keep the original codec - FFmpeg only stream-copies the audio, no re-encode
+                ydl_opts.update({
+                    'format': 'bestaudio/best',
+                    'postprocessors': [{
+                        'key': 'FFmpegExtractAudio',
+                        'preferredcodec': 'best',
+                    }]
+                })
             else:
                 ydl_opts['format'] = 'bestaudio[ext=m4a]/bestaudio/best'
         else:
@@ -187,12 +243,14 @@ class YouTubePlaylistDownloader:
         progress_bar = st.progress(0)
         overall_status = st.empty()
         
-        # Initialize console content
-        console_content = []
+        # Initialize console content - only the most recent lines are kept and rendered
+        console_content = deque(maxlen=200)
+        console_prefix = "<div style='background-color: #000; color: #0f0; padding: 10px; border-radius: 5px; font-family: monospace; height: 300px; overflow-y: auto;'>"
+        console_suffix = "</div>"
         
         def update_console():
             console_output.markdown(
-                f"<div style='background-color: #000; color: #0f0; padding: 10px; border-radius: 5px; font-family: monospace; height: 300px; overflow-y: auto;'>{'<br>'.join(console_content)}</div>", 
+                console_prefix + '<br>'.join(console_content) + console_suffix,
                 unsafe_allow_html=True
             )
         
@@ -200,68 +258,113 @@ class YouTubePlaylistDownloader:
         console_content.append("🚀 Starting download process...")
         console_content.append(f"📁 Downloading {total_count} videos to: {self.download_path}")
         console_content.append("⚡ Using reliable download settings")
+        console_content.append(f"⚡ Parallel downloads: {max_workers} | Concurrent fragments: {concurrent_fragments}")
         if audio_only:
-            console_content.append("🎵 Format: Audio" + (" (MP3)" if self.ffmpeg_available else " (M4A)"))
+            if self.ffmpeg_available:
+                console_content.append("🎵 Format: Audio" + (" (MP3)" if reencode_mp3 else " (original codec)"))
+            else:
+                console_content.append("🎵 Format: Audio (M4A)")
         else:
             console_content.append(f"🎬 Format: Video ({quality})")
         console_content.append("─" * 50)
         update_console()
         
-        for i, idx in enumerate(sorted(selected_indices)):
-            if idx < len(video_urls):
-                video_url = video_urls[idx]
-                video_title = st.session_state.video_data[idx]['title']
-                
-                # Update overall progress
-                overall_status.text(f"Processing {i+1}/{total_count}: {video_title[:60]}...")
-                progress_bar.progress((i) / total_count)
-                
-                # Add to console
-                console_content.append(f"📥 [{i+1}/{total_count}] Starting: {video_title}")
-                update_console()
-                
+        # Status updates from worker threads - drained on the main thread only
+        status_queue = queue.Queue()
+        status_containers = {}
+        
+        def drain_status_queue():
+            # Only the latest status per video is worth rendering
+            latest = {}
+            while True:
                 try:
-                    # Create individual progress hook for this video
-                    status_container = st.empty()
-                    
-                    def create_hook(container, title):
-                        return lambda d: self.progress_hook(d, container, title, console_content, update_console)
-                    
-                    # Set progress hook for this download
-                    current_ydl_opts = ydl_opts.copy()
-                    current_ydl_opts['progress_hooks'] = [create_hook(status_container, video_title)]
+                    update = status_queue.get_nowait()
+                except queue.Empty:
+                    break
+                latest[update['idx']] = update['text']
+            for idx, text in latest.items():
+                status_containers[idx].text(text)
+        
+        # YoutubeDL is not thread-safe, so each worker thread builds one and reuses it
+        thread_state = threading.local()
+        ydl_instances = []
+        
+        def get_ydl():
+            ydl = getattr(thread_state, 'ydl', None)
+            if ydl is None:
+                ydl = thread_state.ydl = yt_dlp.YoutubeDL(ydl_opts)
+                ydl_instances.append(ydl)
+            return ydl
+        
+        # Set when the run is interrupted so running downloads abort at their next progress tick
+        cancel_event = threading.Event()
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = {}
+            for i, idx in enumerate(sorted(selected_indices)):
+                if idx < len(video_urls):
+                    video_url = video_urls[idx]
+                    video_title = st.session_state.video_data[idx]['title']
                     
-                    # SIMPLE DIRECT DOWNLOAD - NO THREADING
-                    console_content.append(f"🔗 [{i+1}/{total_count}] Connecting to: {video_url}")
-                    update_console()
+                    # Individual status line for this video
+                    status_containers[idx] = st.empty()
+                    status_containers[idx].text(f"⏳ {video_title[:50]}... | Queued")
                     
-                    with yt_dlp.YoutubeDL(current_ydl_opts) as ydl:
-                        info = ydl.extract_info(video_url, download=True)
+                    console_content.append(f"📥 [{i+1}/{total_count}] Queued: {video_title}")
+                    future = executor.submit(self._download_one, idx, video_url, get_ydl, status_queue, video_title, cancel_event)
+                    futures[future] = (i, idx, video_title)
+            update_console()
+            
+            completed = 0
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                drain_status_queue()
+                
+                for future in done:
+                    i, idx, video_title = futures[future]
+                    try:
+                        _, filename = future.result()
                         
-                    # Check if file was actually downloaded
-                    filename = ydl.prepare_filename(info)
-                    if os.path.exists(filename):
-                        success_count += 1
-                        file_size = os.path.getsize(filename)
-                        file_size_mb = f"{file_size / 1024 / 1024:.1f}MB"
-                        console_content.append(f"✅ [{i+1}/{total_count}] SUCCESS: {video_title} ({file_size_mb})")
-                        status_container.text(f"✅ {video_title[:50]}... | Download completed")
-                    else:
-                        console_content.append(f"❌ [{i+1}/{total_count}] FAILED: {video_title} - File not created")
-                        status_container.text(f"❌ {video_title[:50]}... | File not created")
+                        # Check if file was actually downloaded
+                        if filename and os.path.exists(filename):
+                            success_count += 1
+                            file_size = os.path.getsize(filename)
+                            file_size_mb = f"{file_size / 1024 / 1024:.1f}MB"
+                            console_content.append(f"✅ [{i+1}/{total_count}] SUCCESS: {video_title} ({file_size_mb})")
+                            status_containers[idx].text(f"✅ {video_title[:50]}... | Download completed")
+                        else:
+                            console_content.append(f"❌ [{i+1}/{total_count}] FAILED: {video_title} - File not created")
+                            status_containers[idx].text(f"❌ {video_title[:50]}... | File not created")
                     
-                except Exception as e:
-                    # Add detailed error message to console
-                    error_msg = str(e)
-                    console_content.append(f"❌ [{i+1}/{total_count}] ERROR: {video_title}")
-                    console_content.append(f"   Details: {error_msg}")
-                    status_container.text(f"❌ {video_title[:50]}... | Error: {error_msg[:50]}")
+                    except Exception as e:
+                        # Add detailed error message to console
+                        error_msg = str(e)
+                        console_content.append(f"❌ [{i+1}/{total_count}] ERROR: {video_title}")
+                        console_content.append(f"   Details: {error_msg}")
+                        status_containers[idx].text(f"❌ {video_title[:50]}... | Error: {error_msg[:50]}")
+                    
+                    completed += 1
                 
-                # Update progress bar
-                progress_bar.progress((i + 1) / total_count)
+                if done:
+                    update_console()
                 
-                # Small delay to make console readable
-                time.sleep(1)
+                # Update overall progress
+                overall_status.text(f"Completed {completed}/{total_count} | {len(pending)} in progress...")
+                progress_bar.progress(completed / total_count)
+        finally:
+            # A Stop or rerun interrupts the polling loop - drop queued videos, abort the
+            # running ones and wait for the workers to exit so no download outlives this run
+            cancel_event.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            
+            # Only safe once the workers are gone - close() must not race a running download
+            for ydl in ydl_instances:
+                try:
+                    ydl.close()
+                except Exception:
+                    pass
         
         # Final summary
         progress_bar.progress(100)
@@ -282,6 +385,86 @@ class YouTubePlaylistDownloader:
         
         return success_count > 0
 
+@st.cache_resource(show_spinner=False)
+def _get_downloader(download_path=None):
+    """Build the downloader once per download folder and reuse it across reruns"""
+    return YouTubePlaylistDownloader(download_path)
+
+def _toggle(i):
+    """Checkbox callback - mirror a single row's checkbox into the selection set"""
+    if st.session_state[f"video_checkbox_{i}"]:
+        st.session_state.selected_videos.add(i)
+    else:
+        st.session_state.selected_videos.discard(i)
+
+@st.fragment
+def _video_row(i, video):
+    """Single video row - toggling its checkbox reruns only this row"""
+    col1, col2, col3 = st.columns([1, 2, 10])
+    
+    with col1:
+        checkbox_key = f"video_checkbox_{i}"
+        if checkbox_key not in st.session_state:
+            st.session_state[checkbox_key] = i in st.session_state.selected_videos
+        
+        st.checkbox(
+            "Select",
+            key=checkbox_key,
+            on_change=_toggle,
+            args=(i,),
+            label_visibility="collapsed"
+        )
+    
+    with col2:
+        # Display thumbnail
+        if video['thumbnail_url']:
+            st.image(
+                video['thumbnail_url'],
+                width=120,
+                caption=""
+            )
+        else:
+            st.image(
+                "https://via.placeholder.com/120x68/333333/FFFFFF?text=No+Thumbnail",
+                width=120,
+                caption="No thumbnail available"
+            )
+    
+    with col3:
+        # Video info
+        st.markdown(f"""
+        <div class="video-info">
+            <div class="video-title">{video['title']}</div>
+            <div class="video-duration">⏱️ {video['duration']}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+@st.fragment(run_every="1s")
+def _selection_counter(total):
+    """Live selection count - video rows rerun on their own, so this polls the selection"""
+    st.write(f"**Selected: {len(st.session_state.selected_videos)}/{total} videos**")
+
+@st.fragment
+def _download_fragment(downloader, audio_only, quality, max_workers, concurrent_fragments, reencode_mp3):
+    """Download section - reruns on its own so progress updates don't re-render the video list"""
+    st.subheader("🚀 Download")
+    
+    # Video rows rerun independently, so the selection is only read when the button is clicked
+    if st.button("📥 Start Download", type="primary", use_container_width=True):
+        if st.session_state.selected_videos:
+            st.success(f"✅ {len(st.session_state.selected_videos)} videos selected")
+            success = downloader.download_videos(
+                st.session_state.video_urls, 
+                st.session_state.selected_videos, 
+                audio_only, 
+                quality,
+                max_workers,
+                concurrent_fragments,
+                reencode_mp3
+            )
+        else:
+            st.warning("⚠️ Please select at least one video to download")
+
 def main():
     st.set_page_config(
         page_title="YouTube Playlist Downloader",
@@ -316,8 +499,16 @@ def main():
     st.title("🎵 YouTube Playlist Downloader")
     st.markdown("Download your favorite playlists with ease!")
     
-    # Initialize downloader
-    downloader = YouTubePlaylistDownloader()
+    # Initialize downloader for the chosen folder (None = default location)
+    if 'download_path' not in st.session_state:
+        st.session_state.download_path = None
+    try:
+        downloader = _get_downloader(st.session_state.download_path)
+    except Exception as e:
+        # The folder may have become unusable - fall back so the sidebar still renders
+        st.error(f"Could not use download folder `{st.session_state.download_path}`: {e}")
+        st.session_state.download_path = None
+        downloader = _get_downloader(None)
     
     # Sidebar with dynamic folder selection
     with st.sidebar:
@@ -335,14 +526,14 @@ def main():
         with col1:
             if st.button("📂 User Downloads", use_container_width=True, help="Save to your Downloads folder"):
                 new_path = get_default_download_path()
-                downloader.download_path = new_path
+                st.session_state.download_path = new_path
                 st.success(f"✅ Set to: `{new_path}`")
                 st.rerun()
         
         with col2:
             if st.button("🔄 App Folder", use_container_width=True, help="Save to app installation folder"):
                 new_path = get_app_data_path()
-                downloader.download_path = new_path
+                st.session_state.download_path = new_path
                 st.success(f"✅ Set to: `{new_path}`")
                 st.rerun()
         
@@ -362,10 +553,16 @@ def main():
                 if selected_folder:
                     # Create a downloads subfolder in the selected location
                     downloads_subfolder = os.path.join(selected_folder, "YouTubeDownloads")
-                    os.makedirs(downloads_subfolder, exist_ok=True)
-                    downloader.download_path = downloads_subfolder
-                    st.success(f"✅ Set to: `{downloads_subfolder}`")
-                    st.rerun()
+                    try:
+                        os.makedirs(downloads_subfolder, exist_ok=True)
+                        if not os.access(downloads_subfolder, os.W_OK):
+                            raise PermissionError("folder is not writable")
+                    except OSError as e:
+                        st.error(f"Could not create `{downloads_subfolder}`: {e}")
+                    else:
+                        st.session_state.download_path = downloads_subfolder
+                        st.success(f"✅ Set to: `{downloads_subfolder}`")
+                        st.rerun()
             except Exception as e:
                 st.error(f"Could not open folder dialog: {e}")
         
@@ -399,6 +596,31 @@ def main():
             quality = "best"
         
         audio_only = download_type == "Audio Only"
+        
+        if audio_only:
+            reencode_mp3 = st.toggle(
+                "🎵 Re-encode to MP3",
+                value=False,
+                help="Convert to MP3 (slower, uses CPU). Off keeps the original audio stream without re-encoding"
+            )
+        else:
+            reencode_mp3 = False
+        
+        max_workers = st.number_input(
+            "⚡ Parallel downloads",
+            min_value=1,
+            max_value=8,
+            value=4,
+            help="Number of videos downloaded at the same time"
+        )
+        
+        concurrent_fragments = st.slider(
+            "🧩 Concurrent fragments",
+            min_value=1,
+            max_value=16,
+            value=8,
+            help="Number of fragments fetched in parallel per video (DASH/HLS formats)"
+        )
     
     # Initialize session state
     if 'selected_videos' not in st.session_state:
@@ -438,48 +660,24 @@ def main():
                     st.subheader("🎬 Select Videos to Download")
                     st.info("✅ Check the boxes next to videos you want to download")
                     
-                    # Prepare video data
-                    video_data = []
-                    video_urls = []
-                    
-                    # Progress for thumbnails
-                    thumbnail_progress = st.progress(0)
-                    status_text = st.empty()
-                    
-                    for i, video in enumerate(videos):
-                        if video:
-                            video_id = video.get('id')
-                            video_url = f"https://www.youtube.com/watch?v={video_id}"
-                            video_urls.append(video_url)
-                            
-                            # Convert duration to readable format
-                            duration = video.get('duration')
-                            if duration and duration != 'Unknown':
-                                minutes, seconds = divmod(duration, 60)
-                                hours, minutes = divmod(minutes, 60)
-                                if hours > 0:
-                                    duration_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                                else:
-                                    duration_str = f"{minutes:02d}:{seconds:02d}"
-                            else:
-                                duration_str = "Unknown"
-                            
-                            # Get thumbnail
-                            status_text.text(f"Loading thumbnails... ({i+1}/{len(videos)})")
-                            thumbnail = downloader.get_video_thumbnail(video_id)
-                            thumbnail_progress.progress((i + 1) / len(videos))
-                            
-                            video_data.append({
-                                'index': i,
-                                'id': video_id,
-                                'title': video.get('title', 'Unknown Title'),
-                                'duration': duration_str,
-                                'url': video_url,
-                                'thumbnail': thumbnail
-                            })
-                    
-                    status_text.text("")
-                    thumbnail_progress.empty()
+                    # Prepare video data - unavailable (None) entries are dropped first so
+                    # every index lines up with video_urls and the checkbox positions
+                    entries = [video for video in videos if video]
+                    duration_strs = [_fmt_dur(video.get('duration')) for video in entries]
+                    video_data = [
+                        {
+                            'index': i,
+                            'id': video.get('id'),
+                            'title': video.get('title', 'Unknown Title'),
+                            'duration': duration_str,
+                            # Reuse the URL from the flat entry so the download skips re-resolving it
+                            'url': video.get('url') or f"https://www.youtube.com/watch?v={video.get('id')}",
+                            # The browser loads the thumbnail straight from YouTube
+                            'thumbnail_url': f"https://i.ytimg.com/vi/{video['id']}/mqdefault.jpg" if video.get('id') else None
+                        }
+                        for i, (video, duration_str) in enumerate(zip(entries, duration_strs))
+                    ]
+                    video_urls = [video['url'] for video in video_data]
                     
                     # Store in session state
                     st.session_state.video_data = video_data
@@ -495,12 +693,16 @@ def main():
                     # Handle select all/clear all buttons
                     if select_all:
                         st.session_state.selected_videos = set(range(len(video_data)))
+                        for i in range(len(video_data)):
+                            st.session_state[f"video_checkbox_{i}"] = True
                         st.session_state.select_all_clicked = True
                         st.session_state.clear_all_clicked = False
                         st.rerun()
                     
                     if clear_all:
                         st.session_state.selected_videos = set()
+                        for i in range(len(video_data)):
+                            st.session_state[f"video_checkbox_{i}"] = False
                         st.session_state.clear_all_clicked = True
                         st.session_state.select_all_clicked = False
                         st.rerun()
@@ -514,76 +716,14 @@ def main():
                         st.info("🗑️ All selections cleared!")
                         st.session_state.clear_all_clicked = False
                     
-                    # Display videos with checkboxes and thumbnails
-                    st.write(f"**Selected: {len(st.session_state.selected_videos)}/{len(video_data)} videos**")
+                    # Display videos with checkboxes and thumbnails - each row reruns on its own
+                    _selection_counter(len(video_data))
                     
-                    # Create a form to handle checkbox state properly
-                    with st.form("video_selection_form"):
-                        # Create checkboxes and handle their state
-                        for i, video in enumerate(video_data):
-                            col1, col2, col3 = st.columns([1, 2, 10])
-                            
-                            with col1:
-                                # Checkbox with proper state management
-                                is_checked = st.checkbox(
-                                    "Select",
-                                    key=f"video_checkbox_{i}",
-                                    value=(i in st.session_state.selected_videos),
-                                    label_visibility="collapsed"
-                                )
-                            
-                            with col2:
-                                # Display thumbnail
-                                if video['thumbnail']:
-                                    st.image(
-                                        video['thumbnail'],
-                                        width=120,
-                                        caption=""
-                                    )
-                                else:
-                                    st.image(
-                                        "https://via.placeholder.com/120x68/333333/FFFFFF?text=No+Thumbnail",
-                                        width=120,
-                                        caption="No thumbnail available"
-                                    )
-                            
-                            with col3:
-                                # Video info
-                                st.markdown(f"""
-                                <div class="video-info">
-                                    <div class="video-title">{video['title']}</div>
-                                    <div class="video-duration">⏱️ {video['duration']}</div>
-                                </div>
-                                """, unsafe_allow_html=True)
-                        
-                        # Update selections when form is submitted
-                        submitted = st.form_submit_button("Update Selections", use_container_width=True)
-                        if submitted:
-                            # Re-read all checkbox states
-                            new_selections = set()
-                            for i in range(len(video_data)):
-                                checkbox_key = f"video_checkbox_{i}"
-                                if checkbox_key in st.session_state and st.session_state[checkbox_key]:
-                                    new_selections.add(i)
-                            
-                            st.session_state.selected_videos = new_selections
-                            st.rerun()
+                    for i, video in enumerate(video_data):
+                        _video_row(i, video)
                     
                     # Download section
-                    st.subheader("🚀 Download")
-                    
-                    if st.session_state.selected_videos:
-                        st.success(f"✅ {len(st.session_state.selected_videos)} videos selected")
-                        
-                        if st.button("📥 Start Download", type="primary", use_container_width=True):
-                            success = downloader.download_videos(
-                                st.session_state.video_urls, 
-                                st.session_state.selected_videos, 
-                                audio_only, 
-                                quality
-                            )
-                    else:
-                        st.warning("⚠️ Please select at least one video to download")
+                    _download_fragment(downloader, audio_only, quality, int(max_workers), concurrent_fragments, reencode_mp3)
                 
                 else:
                     st.error("❌ No videos found in this playlist")
@@ -603,7 +743,7 @@ def main():
         
         ## 🔧 Features:
         - ✅ Download entire playlists or individual videos
-        - 🎵 Audio downloads (MP3 when possible)
+        - 🎵 Audio downloads (original format, or MP3 on request)
         - 📱 Mobile-friendly interface
         - 🎯 Selective video downloading
         - ⚡ Real-time progress tracking